@@ -14,14 +14,14 @@ companies format their financial data.
 How to Run:
 -------------
 The script is executed from the command line and requires two arguments: an input
-directory and an output file path. An optional argument can be provided to specify
-a log file path.
+directory and an output file path. Optional arguments can be provided to specify
+a log file path and to enable verbose per-filing logging.
 
 1.  Save this script as `parser.py`.
 2.  Make sure you have a directory containing your HTML filing files.
 3.  Open your terminal or command prompt and run the script using the following format:
 
-    python parser.py [INPUT_DIRECTORY] [OUTPUT_CSV_FILE] --log_file [LOG_FILE_PATH]
+    python parser.py [INPUT_DIRECTORY] [OUTPUT_CSV_FILE] --log_file [LOG_FILE_PATH] [--verbose]
 
 Example Command:
     python parser.py /path/to/your/filings /path/to/your/output.csv --log_file /path/to/logs/parser.log
@@ -30,15 +30,16 @@ Example Command:
 - `[OUTPUT_CSV_FILE]`: The full path where the final CSV results should be saved.
 - `[LOG_FILE_PATH]` (Optional): The path for the log file. If not provided, it defaults
   to creating `parser.log` in the current directory.
+- `--verbose` (Optional): Also log the progress and result of every individual filing.
+  By default, only failed filings and the final summary are logged.
 
 Required Libraries:
 -------------------
 - beautifulsoup4
-- pandas
 - lxml
 
 You can install these using pip:
-    pip install beautifulsoup4 pandas lxml
+    pip install beautifulsoup4 lxml
 
 How It Works:
 -------------
@@ -53,7 +54,9 @@ The parser uses a multi-layered strategy to find the most accurate EPS value:
     running the same prioritized regex patterns on the full text of the document.
 4.  **Logging & Analytics:** The script generates a detailed log file of its operations and
     provides a summary report on which keywords were most successful, which helps
-    in refining the parser over time.
+    in refining the parser over time. The matches of every run are also added to the
+    totals kept in `~/.cache/edgar-parser/pattern_freq.json`, from which the patterns of
+    each tier are ranked across all runs.
 
 Disclaimer:
 -----------
@@ -63,18 +66,36 @@ application, assistance from LLMs such as Gemini and ChatGPT was used.
 """
 
 import argparse
+import csv
+import json
 import os
 import re
 import time
 import logging
+import mmap
+import multiprocessing
 from collections import defaultdict
-import pandas as pd
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from typing import DefaultDict, Optional
+from lxml import etree
+from lxml.html import soupparser
 
 # --- Global Keyword Frequency Counter ---
 # This dictionary will store the count of successful matches for each keyword pattern.
 # It uses defaultdict(int) so that if a key doesn't exist, it's automatically initialized to 0.
-KEYWORD_FREQUENCY = defaultdict(int)
+KEYWORD_FREQUENCY: DefaultDict[str, int] = defaultdict(int)
+
+# --- Per-Filing Logger ---
+# Messages about individual filings are logged through their own logger, so that the
+# per-filing INFO messages can be silenced (the default) without hiding the run summary.
+# Their arguments are passed %-style, so they are only formatted if the message is emitted.
+filing_logger = logging.getLogger("edgar_parser.filings")
+
+# --- Cumulative Keyword Frequency File ---
+# The keyword frequencies of every run are added to the totals stored in this file, so that
+# the ranking of the patterns within each tier reflects all of the filings parsed so far.
+PATTERN_FREQUENCY_FILE = os.path.join(os.path.expanduser("~"), ".cache", "edgar-parser", "pattern_freq.json")
 
 # --- Pre-compiled Regular Expressions for Performance ---
 # Compiling regex patterns once at the module level is more efficient than re-compiling
@@ -108,8 +129,92 @@ EPS_KEYWORD_PATTERNS = {
     ]
 }
 
+# Words that every pattern in a priority tier contains at least one of (matched without
+# regard to case). A tier's regexes can only match text that contains one of its words,
+# and plain substring checks for them are far cheaper than running the regexes, so they
+# are used to rule out text first. When adding a new pattern, make sure that it contains
+# one of its tier's words, or add a new word here.
+TIER_LITERALS = {
+    "basic": ("basic",),
+    "diluted": ("diluted",),
+    "generic": ("eps", "share"),
+}
+
+# The checks against TIER_LITERALS only match re.IGNORECASE for ASCII text, because
+# re.IGNORECASE also treats these non-ASCII characters as letters of those words ("İ" and
+# "ı" as "i", "ſ" as "s"). Text that is not ASCII is therefore always searched with the
+# regexes, and a file containing any of these characters is never skipped.
+NON_ASCII_CASE_VARIANTS = ("\u0130", "\u0131", "\u017f")
+
+# A flattened view of the keyword patterns in search order, as (priority, pattern) tuples.
+# A lower index means a more desirable match, which lets matches found in different
+# tables be compared directly.
+PRIORITIZED_PATTERNS = [
+    (priority, pattern)
+    for priority in ["basic", "diluted", "generic"]
+    for pattern in EPS_KEYWORD_PATTERNS[priority]
+]
+
+# Each priority tier's patterns merged into a single alternation, so that a piece of text
+# can be tested against a whole tier in one pass instead of one search per pattern. Every
+# alternative is wrapped in a named group ("p" + its index in PRIORITIZED_PATTERNS), which
+# lets the sub-pattern that matched be recovered from `match.lastgroup`.
+TIER_REGEX = {
+    priority: re.compile(
+        "|".join(
+            f"(?P<p{index}>{pattern.pattern})"
+            for index, (tier, pattern) in enumerate(PRIORITIZED_PATTERNS)
+            if tier == priority
+        ),
+        re.IGNORECASE
+    )
+    for priority in ["basic", "diluted", "generic"]
+}
+
+# _find_keyword_index runs for every table row, so everything it needs is looked up once
+# here: for each tier in priority order, the index of its first pattern, its words from
+# TIER_LITERALS and its combined regex's bound `search` method. The bound `search` method
+# of each individual pattern is kept in PATTERN_SEARCHES, in the same order as
+# PRIORITIZED_PATTERNS.
+TIER_SEARCHES = [
+    (
+        next(index for index, (tier, _) in enumerate(PRIORITIZED_PATTERNS) if tier == priority),
+        TIER_LITERALS[priority],
+        TIER_REGEX[priority].search
+    )
+    for priority in ["basic", "diluted", "generic"]
+]
+PATTERN_SEARCHES = [pattern.search for _, pattern in PRIORITIZED_PATTERNS]
+
+# The regex fallback searches for each keyword followed by a number. The ".{0,50}?" part
+# creates a non-greedy search window of up to 50 characters between the two. These are
+# compiled once here rather than once per pattern for every filing that needs the fallback.
+EPS_FALLBACK_PATTERNS = {
+    priority: [
+        re.compile(pattern.pattern + r".{0,50}?(\(?\$\s?\d+\.\d+\)?)", re.IGNORECASE)
+        for pattern in patterns
+    ]
+    for priority, patterns in EPS_KEYWORD_PATTERNS.items()
+}
+
+# A file whose raw bytes contain none of the words in TIER_LITERALS cannot produce a match,
+# unless it contains one of NON_ASCII_CASE_VARIANTS. This is checked before any HTML
+# parsing, letting filings without an EPS section be skipped cheaply.
+EPS_PREFILTER_PATTERN = re.compile(
+    "|".join(
+        [literal for literals in TIER_LITERALS.values() for literal in literals]
+        + list(NON_ASCII_CASE_VARIANTS)
+    ).encode(),
+    re.IGNORECASE
+)
+
+# The number of bytes of a filing that are fed to the HTML parser at a time. Tables are
+# handed to the search as soon as the chunk that completes them has been parsed, so the
+# rest of the file is never parsed once the search stops.
+FEED_CHUNK_SIZE = 64 * 1024
 
-def _format_eps_value(raw_string):
+
+def _format_eps_value(raw_string: str) -> Optional[str]:
     """
     Formats a raw string containing a number into a standardized EPS value string.
     This function correctly handles negative numbers, which are often denoted by parentheses
@@ -129,36 +234,290 @@ def _format_eps_value(raw_string):
     # A value is considered negative if it's enclosed in parentheses.
     is_negative = '(' in raw_string
     
-    # Extract the numeric part of the string (e.g., "0.41" from "($0.41)").
-    numeric_match = re.search(r'(\d+\.\d+)', raw_string)
-    
-    if numeric_match:
+    # Extract the numeric part of the string (e.g., "0.41" from "($0.41)"). Table cells are
+    # usually just a number wrapped in spaces, "$" or parentheses, which plain string
+    # operations can handle. Anything else falls back to a regex search.
+    numeric_part = raw_string.strip(' $()')
+    whole, dot, fraction = numeric_part.partition('.')
+    if not (dot and whole.isdecimal() and fraction.isdecimal()):
+        numeric_match = re.search(r'(\d+\.\d+)', raw_string)
+        if not numeric_match:
+            return None
         numeric_part = numeric_match.group(1)
-        # Prepend a hyphen if the value was determined to be negative.
-        return f"-{numeric_part}" if is_negative else numeric_part
-        
+
+    # Prepend a hyphen if the value was determined to be negative.
+    return f"-{numeric_part}" if is_negative else numeric_part
+
+
+def _get_text(element):
+    """
+    Returns the text content of an element, with every text fragment stripped of
+    surrounding whitespace before being joined. This mirrors BeautifulSoup's
+    `get_text(strip=True)`, so keyword patterns see the same text as before.
+
+    Args:
+        element (lxml.html.HtmlElement): The element to extract the text from.
+
+    Returns:
+        str: The concatenated, stripped text of the element and its descendants.
+    """
+    return ''.join(text.strip() for text in element.itertext())
+
+
+class _EPSTarget:
+    """
+    An lxml parser target that collects the text of every table row and cell, along with
+    the text of the whole document, in a single pass over the HTML. lxml calls its methods
+    for each tag and piece of text as it parses, so no document tree is ever built.
+
+    Text is collected the same way as by `_get_text` on an element: each text fragment is
+    stripped before being joined, and comments as well as the contents of <script> and
+    <style> elements are left out. A row or cell includes the text of any table nested in
+    it, and the rows of a nested table also count as rows of the enclosing tables.
+
+    Attributes:
+        tables (list): The tables completed since the caller last collected them, in
+                       document order. Each table is a list of (row_text, cell_texts)
+                       tuples, one per row, with the row's whitespace-normalised text and
+                       the stripped text of each of its cells.
+        text_fragments (list): Every stripped text fragment in the document so far.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Discards everything collected so far, ready for a new document."""
+        self.tables = []
+        self.text_fragments = []
+        self._pending_text = []   # The pieces of the text fragment currently being read.
+        self._open_kinds = []     # What each currently open element is being tracked as.
+        self._skip_depth = 0      # The number of open <script> and <style> elements.
+        self._open_tables = []
+        self._open_rows = []
+        self._open_cells = []
+        self._table_group = []    # The outermost open table, followed by its nested tables.
+
+    def _flush_text(self):
+        # lxml can deliver a single text fragment in several pieces, so the pieces are only
+        # joined and stripped when the next tag, comment or the end of the document is reached.
+        if not self._pending_text:
+            return
+        text = ''.join(self._pending_text).strip()
+        self._pending_text = []
+        if text and not self._skip_depth:
+            self.text_fragments.append(text)
+            for row_fragments, _ in self._open_rows:
+                row_fragments.append(text)
+            for cell_fragments in self._open_cells:
+                cell_fragments.append(text)
+
+    def start(self, tag, attrib):
+        self._flush_text()
+        kind = None
+        if tag == 'script' or tag == 'style':
+            self._skip_depth += 1
+            kind = 'skip'
+        elif tag == 'table':
+            table = []
+            if not self._open_tables:
+                self._table_group = []
+            self._table_group.append(table)
+            self._open_tables.append(table)
+            kind = 'table'
+        elif tag == 'tr' and self._open_tables:
+            row = ([], [])
+            for table in self._open_tables:
+                table.append(row)
+            self._open_rows.append(row)
+            kind = 'row'
+        elif (tag == 'td' or tag == 'th') and self._open_rows:
+            cell = []
+            for _, cells in self._open_rows:
+                cells.append(cell)
+            self._open_cells.append(cell)
+            kind = 'cell'
+        self._open_kinds.append(kind)
+
+    def end(self, tag):
+        self._flush_text()
+        kind = self._open_kinds.pop()
+        if kind == 'skip':
+            self._skip_depth -= 1
+        elif kind == 'table':
+            self._open_tables.pop()
+            # A nested table is handed over together with its outermost table, once that
+            # table is complete, so that every row of the outer table is available.
+            if not self._open_tables:
+                for table in self._table_group:
+                    self.tables.append([
+                        (' '.join(''.join(row_fragments).split()), [''.join(cell) for cell in cells])
+                        for row_fragments, cells in table
+                    ])
+        elif kind == 'row':
+            self._open_rows.pop()
+        elif kind == 'cell':
+            self._open_cells.pop()
+
+    def data(self, data):
+        self._pending_text.append(data)
+
+    def comment(self, text):
+        # A comment separates the text before it from the text after it.
+        self._flush_text()
+
+    def close(self):
+        self._flush_text()
+
+
+# Setting up an lxml parser for its first document costs more than parsing a small filing,
+# so each process creates a single parser, along with its target, and reuses them for every
+# filing. The target is reset and the parser is closed between filings by _iter_tables.
+_EPS_TARGET = _EPSTarget()
+_HTML_PARSER = etree.HTMLParser(target=_EPS_TARGET, encoding='utf-8')
+
+
+def _iter_tables(buffer):
+    """
+    Feeds an HTML document to the shared lxml parser in chunks, with _EPS_TARGET
+    collecting the tables, and yields each table as soon as it is complete. If the caller
+    stops iterating, the rest of the document is never parsed. Once the generator is
+    finished or closed, the document's text is available in _EPS_TARGET.text_fragments.
+
+    Args:
+        buffer (mmap.mmap): The raw bytes of the HTML document.
+
+    Yields:
+        list: Each table in the document, as a list of (row_text, cell_texts) tuples.
+    """
+    _EPS_TARGET.reset()
+    finished = False
+    try:
+        for offset in range(0, len(buffer), FEED_CHUNK_SIZE):
+            _HTML_PARSER.feed(buffer[offset:offset + FEED_CHUNK_SIZE])
+            yield from _EPS_TARGET.tables
+            _EPS_TARGET.tables = []
+        finished = True
+        _HTML_PARSER.close()
+    finally:
+        if not finished:
+            # The document was abandoned part-way through, either because the caller stopped
+            # iterating or because lxml raised an error. Closing the parser discards the
+            # rest of it, so that the parser is ready for the next filing.
+            try:
+                _HTML_PARSER.close()
+            except etree.LxmlError:
+                pass
+    yield from _EPS_TARGET.tables
+    _EPS_TARGET.tables = []
+
+
+def _get_table_rows(table):
+    """
+    Extracts the text of every row of a table element, in the same form as the tables
+    collected by _EPSTarget. This is used for documents that lxml could not parse, which
+    are built into a tree by BeautifulSoup instead.
+
+    Args:
+        table (lxml.html.HtmlElement): The element for a single HTML table.
+
+    Returns:
+        list: A (row_text, cell_texts) tuple for each row of the table.
+    """
+    return [(' '.join(_get_text(row).split()), _get_cell_texts(row)) for row in table.iter('tr')]
+
+
+def _find_keyword_index(text, limit):
+    """
+    Finds the highest-priority keyword pattern that matches the given text.
+
+    A tier is skipped without running any regex if the text is ASCII and contains none of
+    its words from TIER_LITERALS, which rules out most table rows. Otherwise the tier is tested with
+    its combined regex. The combined regex reports the leftmost match in the text rather
+    than the highest-priority one, so only the patterns ranked above the reported one need
+    to be re-checked individually.
+
+    Args:
+        text (str): The text to search.
+        limit (int): Only patterns with an index below this value are considered.
+
+    Returns:
+        int: The index into PRIORITIZED_PATTERNS of the best matching pattern, or None.
+    """
+    # Non-ASCII text is never ruled out by the words (see NON_ASCII_CASE_VARIANTS).
+    folded_text = text.casefold() if text.isascii() else None
+    for tier_start, literals, tier_search in TIER_SEARCHES:
+        if tier_start >= limit:
+            return None
+        if folded_text is None or any(literal in folded_text for literal in literals):
+            match = tier_search(text)
+            if match:
+                matched_index = int(match.lastgroup[1:])
+                for index in range(tier_start, min(matched_index, limit)):
+                    if PATTERN_SEARCHES[index](text):
+                        return index
+                return matched_index if matched_index < limit else None
     return None
 
 
-def _get_search_direction(table):
+def _is_eps_like(text: str) -> bool:
+    """
+    Checks whether a cell's text is a valid EPS value (e.g., "1.23", "$ 1.23" or "(0.41)").
+    Most cells hold text labels or whole numbers, so a few cheap character checks are
+    used to reject them before the full EPS_VALUE_PATTERN regex is run.
+
+    Args:
+        text (str): The stripped text of a table cell.
+
+    Returns:
+        bool: True if the text matches EPS_VALUE_PATTERN, otherwise False.
+    """
+    if not text:
+        return False
+    # A value must start with "(", "$" or a digit, and end with ")" or a digit.
+    first, last = text[0], text[-1]
+    if not (first == '(' or first == '$' or first.isdecimal()):
+        return False
+    if not (last == ')' or last.isdecimal()):
+        return False
+    # A value must have a decimal point.
+    if '.' not in text:
+        return False
+    return EPS_VALUE_PATTERN.match(text) is not None
+
+
+def _get_cell_texts(row):
+    """
+    Extracts the stripped text of every cell (<td> or <th>) in a table row.
+
+    Args:
+        row (lxml.html.HtmlElement): The element for a single table row (<tr>).
+
+    Returns:
+        list: The text of each cell, in document order.
+    """
+    return [_get_text(cell) for cell in row.iter('td', 'th')]
+
+
+def _get_search_direction(header_rows):
     """
     Analyzes a table's header to determine the chronological order of its columns.
     Many financial tables list the most recent quarter first (left), but some do the opposite.
     This function returns a 'direction' to guide the search for the EPS value.
 
     Args:
-        table (bs4.element.Tag): The BeautifulSoup object for a single HTML table.
+        header_rows (list): The cell texts of the table's first rows, as one list of
+                            strings per row. Only the first 5 rows are needed.
 
     Returns:
         str: 'left-to-right' or 'right-to-left', indicating the search direction.
     """
-    header_rows = table.find_all('tr', limit=5) # Limit search to the first 5 rows for efficiency.
     year_positions = []
 
     # Find all year numbers (e.g., "2020") in the header and record their column index.
     for row in header_rows:
-        for i, cell in enumerate(row.find_all(['th', 'td'])):
-            matches = YEAR_PATTERN.findall(cell.get_text(strip=True))
+        for i, cell_text in enumerate(row):
+            matches = YEAR_PATTERN.findall(cell_text)
             if matches:
                 year_positions.append({'year': int(matches[0]), 'index': i})
 
@@ -184,7 +543,7 @@ def _find_value_in_row(cells, search_direction):
     right-to-left) and returns the first valid EPS value found.
 
     Args:
-        cells (list): A list of BeautifulSoup cell elements (<td> or <th>).
+        cells (list): The stripped text of each cell (<td> or <th>) in the row.
         search_direction (str): The direction to search ('left-to-right' or 'right-to-left').
 
     Returns:
@@ -192,83 +551,104 @@ def _find_value_in_row(cells, search_direction):
     """
     # Set the iteration order based on the determined search direction.
     cell_iterator = reversed(cells) if search_direction == 'right-to-left' else cells
-    for cell in cell_iterator:
-        cell_text = cell.get_text(strip=True)
+    for cell_text in cell_iterator:
         # Check if the cell's content matches the pattern for an EPS value.
-        if EPS_VALUE_PATTERN.match(cell_text):
+        if _is_eps_like(cell_text):
             eps_value = _format_eps_value(cell_text)
             if eps_value:
                 return eps_value
     return None
 
 
-def _parse_eps_from_tables(soup):
+def _parse_eps_from_tables(tables):
     """
     Strategy 1: Finds the EPS value by searching all financial tables in the document.
-    This function respects the keyword priority and dynamically determines the search
-    direction for each table.
+    Every table is walked once, and each row is tested against the keyword patterns in
+    priority order. The search stops at the first "basic" match that yields a value, since
+    no later table could produce a better tier. Otherwise the highest-priority match across
+    all tables wins, and ties are resolved in favour of the match that appears first in the
+    document. The search direction is determined dynamically for each table. Tables are
+    consumed lazily, so the rest of the document is not read once the search stops.
 
     Args:
-        soup (bs4.BeautifulSoup): The BeautifulSoup object for the entire HTML document.
+        tables (iterable): The tables of the document, in document order, each given as a
+                           list of (row_text, cell_texts) tuples.
 
     Returns:
         tuple: A tuple containing (eps_value, method, keyword_pattern) if successful,
                otherwise (None, None, None).
     """
     try:
-        # Loop through the keyword priorities ('basic', then 'diluted', then 'generic').
-        for priority in ["basic", "diluted", "generic"]:
-            # Loop through each pre-compiled regex pattern within that priority group.
-            for pattern in EPS_KEYWORD_PATTERNS[priority]:
-                # Search every table for the current high-priority pattern.
-                for table in soup.find_all('table'):
-                    search_direction = _get_search_direction(table)
-                    rows = table.find_all('tr')
-
-                    for i, row in enumerate(rows):
-                        row_text = ' '.join(row.get_text(strip=True).split())
-                        # If the pattern is found in the row's text...
-                        if pattern.search(row_text):
-                            # ...first, try to find the value in the current row.
-                            cells = row.find_all(['td', 'th'])
-                            eps_value = _find_value_in_row(cells, search_direction)
-                            if eps_value:
-                                method = f"Table ({'R-L' if search_direction == 'right-to-left' else 'L-R'} Search)"
-                                return eps_value, method, pattern.pattern
-
-                            # If not found, check the next row, as some formats place the value there.
-                            if i + 1 < len(rows):
-                                next_row_cells = rows[i + 1].find_all(['td', 'th'])
-                                eps_value = _find_value_in_row(next_row_cells, search_direction)
-                                if eps_value:
-                                    method = f"Table (Next Row, {'R-L' if search_direction == 'right-to-left' else 'L-R'} Search)"
-                                    return eps_value, method, pattern.pattern
+        # The best match found so far, as (pattern_index, eps_value, method, keyword_pattern).
+        # Each table and row is walked only once. A row can only replace the current best
+        # match if it matches a higher-priority pattern, so a "basic" match in a later table
+        # still beats a "diluted" match in an earlier one.
+        best = None
+        for rows in tables:
+            search_direction = None
+
+            for i, (row_text, cells) in enumerate(rows):
+                # Find the highest-priority pattern in the row's text. Only patterns that
+                # would improve on the current best match need to be tried.
+                limit = best[0] if best else len(PRIORITIZED_PATTERNS)
+                match_index = _find_keyword_index(row_text, limit)
+                if match_index is None:
+                    continue
+                pattern = PRIORITIZED_PATTERNS[match_index][1]
+
+                # Most tables never match a keyword, so the search direction is only determined
+                # once a row matches. It is then reused for every other match in the same table.
+                if search_direction is None:
+                    search_direction = _get_search_direction([header_cells for _, header_cells in rows[:5]])
+                    direction_label = 'R-L' if search_direction == 'right-to-left' else 'L-R'
+
+                # First, try to find the value in the current row.
+                eps_value = _find_value_in_row(cells, search_direction)
+                if eps_value:
+                    best = (match_index, eps_value, f"Table ({direction_label} Search)", pattern.pattern)
+                # If not found, check the next row, as some formats place the value there.
+                elif i + 1 < len(rows):
+                    eps_value = _find_value_in_row(rows[i + 1][1], search_direction)
+                    if eps_value:
+                        best = (match_index, eps_value, f"Table (Next Row, {direction_label} Search)", pattern.pattern)
+
+                if best and PRIORITIZED_PATTERNS[best[0]][0] == "basic":
+                    return best[1:]
+
+        if best:
+            return best[1:]
         return None, None, None
+    except etree.LxmlError:
+        # Parser errors are left to the caller, which retries with a more lenient parser.
+        raise
     except Exception as e:
-        logging.error(f"  > An unexpected error occurred during table parsing: {e}")
+        filing_logger.error("  > An unexpected error occurred during table parsing: %s", e)
         return None, None, None
 
 
-def _parse_eps_with_regex(soup):
+def _parse_eps_with_regex(full_text):
     """
     Strategy 2 (Fallback): Finds the EPS value by running regex patterns against the
     entire raw text of the document. This is less reliable than table parsing but
     is a good fallback.
 
     Args:
-        soup (bs4.BeautifulSoup): The BeautifulSoup object for the entire HTML document.
-        
+        full_text (str): The whitespace-normalised text of the entire HTML document.
+
     Returns:
         tuple: A tuple containing (eps_value, method, keyword_pattern) if successful,
                otherwise (None, None, None).
     """
-    full_text = ' '.join(soup.get_text(strip=True).split())
+    # Non-ASCII text is never ruled out by the words (see NON_ASCII_CASE_VARIANTS).
+    folded_text = full_text.casefold() if full_text.isascii() else None
 
     for priority in ["basic", "diluted", "generic"]:
-        for pattern in EPS_KEYWORD_PATTERNS[priority]:
-            # Dynamically build a search pattern to find the keyword followed by a number.
-            # The ".{0,50}?" part creates a non-greedy search window of up to 50 characters.
-            regex = re.compile(pattern.pattern + r".{0,50}?(\(?\$\s?\d+\.\d+\)?)", re.IGNORECASE)
+        # Skip the whole tier if none of its keywords appear in the text.
+        if folded_text is not None and not any(literal in folded_text for literal in TIER_LITERALS[priority]):
+            continue
+        if not TIER_REGEX[priority].search(full_text):
+            continue
+        for pattern, regex in zip(EPS_KEYWORD_PATTERNS[priority], EPS_FALLBACK_PATTERNS[priority]):
             match = regex.search(full_text)
             if match:
                 eps_value = _format_eps_value(match.group(1))
@@ -277,6 +657,53 @@ def _parse_eps_with_regex(soup):
     return None, None, None
 
 
+def _parse_eps_from_document(buffer, filename):
+    """
+    Applies the parsing strategies, in order, to the raw bytes of a single HTML document.
+
+    Args:
+        buffer (mmap.mmap): The memory-mapped contents of the HTML filing.
+        filename (str): The name of the filing, used for logging.
+
+    Returns:
+        tuple: A tuple containing (eps_value, method, keyword_pattern) if successful,
+               otherwise (None, None, None).
+    """
+    # Attempt to find EPS using the most reliable method first (tables). The tables are
+    # collected in a single streaming pass over the buffer, which also collects the text
+    # for the regex fallback, so no document tree is ever built.
+    tables = _iter_tables(buffer)
+    full_text = None
+    try:
+        eps_value, method, keyword_pattern = _parse_eps_from_tables(tables)
+        if eps_value is None:
+            # Make sure that the whole document has been read, so that all of its text has
+            # been collected for the regex fallback.
+            for _ in tables:
+                pass
+            full_text = ' '.join(''.join(_EPS_TARGET.text_fragments).split())
+    except etree.LxmlError as e:
+        # For pages that lxml cannot parse, build the tree with BeautifulSoup instead.
+        filing_logger.warning("  [!] lxml could not parse %s (%s). Retrying with BeautifulSoup.", filename, e)
+        root = soupparser.fromstring(buffer[:].decode('utf-8'))
+        etree.strip_elements(root, 'script', 'style', with_tail=False)
+        eps_value, method, keyword_pattern = _parse_eps_from_tables(
+            _get_table_rows(table) for table in root.iter('table')
+        )
+        full_text = ' '.join(_get_text(root).split())
+    finally:
+        # Stop parsing the rest of the document if the table search ended early, so that
+        # the shared parser is ready for the next filing.
+        tables.close()
+
+    # If the table search fails, fall back to the regex search on the full text.
+    if eps_value is None:
+        filing_logger.info("  [i] No EPS found in tables for %s. Attempting regex search.", filename)
+        eps_value, method, keyword_pattern = _parse_eps_with_regex(full_text)
+
+    return eps_value, method, keyword_pattern
+
+
 def parse_html_filing(file_path):
     """
     Orchestrates the parsing of a single HTML file by applying strategies in order.
@@ -285,47 +712,59 @@ def parse_html_filing(file_path):
         file_path (str): The full path to the HTML filing.
 
     Returns:
-        tuple: A tuple containing (filename, eps_value).
+        tuple: A tuple containing (filename, eps_value, keyword_pattern). The keyword
+               pattern is returned so that the main process can aggregate the
+               keyword frequency report across all worker processes.
     """
     start_time = time.time()
     filename = os.path.basename(file_path)
-    logging.info(f"--- Starting analysis for {filename} ---")
+    filing_logger.info("--- Starting analysis for %s ---", filename)
     
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            soup = BeautifulSoup(f, 'lxml')
-
-        # Attempt to find EPS using the most reliable method first (tables).
-        eps_value, method, keyword_pattern = _parse_eps_from_tables(soup)
+        with open(file_path, 'rb') as f:
+            # An empty file cannot contain an EPS value (and cannot be memory-mapped).
+            if os.fstat(f.fileno()).st_size == 0:
+                eps_value, method, keyword_pattern = None, None, None
+            else:
+                # Memory-map the file so that lxml reads the raw bytes straight from the OS
+                # page cache, rather than from a copy of the file held in a Python string.
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    # Skip the HTML parse entirely if no keyword can appear in the document.
+                    if not EPS_PREFILTER_PATTERN.search(buffer):
+                        duration = time.time() - start_time
+                        filing_logger.warning("  [SKIPPED] No EPS keywords found in %s. | Time: %.2fs", filename, duration)
+                        return filename, None, None
+                    eps_value, method, keyword_pattern = _parse_eps_from_document(buffer, filename)
 
-        # If the table search fails, fall back to the regex search on the full text.
-        if eps_value is None:
-            logging.info(f"  [i] No EPS found in tables for {filename}. Attempting regex search.")
-            eps_value, method, keyword_pattern = _parse_eps_with_regex(soup)
-        
         duration = time.time() - start_time
         
         if keyword_pattern:
-            # If a match was found, record which keyword pattern was successful.
-            KEYWORD_FREQUENCY[keyword_pattern] += 1
-            logging.info(f"  [SUCCESS] Found EPS: {eps_value} | Method: {method} | Keyword: '{keyword_pattern}' | Time: {duration:.2f}s")
+            filing_logger.info(
+                "  [SUCCESS] Found EPS: %s | Method: %s | Keyword: '%s' | Time: %.2fs",
+                eps_value, method, keyword_pattern, duration
+            )
         else:
-            logging.warning(f"  [FAILURE] Could not find EPS for {filename}. | Time: {duration:.2f}s")
+            filing_logger.warning("  [FAILURE] Could not find EPS for %s. | Time: %.2fs", filename, duration)
 
-        return filename, eps_value
+        return filename, eps_value, keyword_pattern
 
     except Exception as e:
         duration = time.time() - start_time
-        logging.error(f"  [CRITICAL] An unexpected error occurred while parsing {filename}: {e} | Time: {duration:.2f}s")
-        return filename, None
+        filing_logger.error(
+            "  [CRITICAL] An unexpected error occurred while parsing %s: %s | Time: %.2fs",
+            filename, e, duration
+        )
+        return filename, None, None
 
 
-def setup_logging(log_file):
+def setup_logging(log_file, verbose=False):
     """
     Configures the logging system to output messages to both a specified file and the console.
     
     Args:
         log_file (str): The path to the log file.
+        verbose (bool): If True, also log the INFO messages for each individual filing.
+                        Otherwise only their warnings and errors are logged.
     """
     # Ensure the directory for the log file exists.
     log_dir = os.path.dirname(log_file)
@@ -343,14 +782,94 @@ def setup_logging(log_file):
             logging.StreamHandler() # This handler sends logs to the console.
         ]
     )
+    filing_logger.setLevel(logging.INFO if verbose else logging.WARNING)
+
+
+def _init_worker(log_queue, log_level, filing_log_level):
+    """
+    Initializer for each worker process. Replaces any inherited log handlers with a
+    QueueHandler so that all log records are sent back to the main process, which is
+    the only process that writes to the log file and the console.
+
+    Args:
+        log_queue (multiprocessing.Queue): The queue shared with the main process's listener.
+        log_level (int): The logging level configured in the main process.
+        filing_log_level (int): The level of the per-filing logger in the main process.
+    """
+    root_logger = logging.getLogger()
+    root_logger.handlers = [QueueHandler(log_queue)]
+    root_logger.setLevel(log_level)
+    filing_logger.setLevel(filing_log_level)
+
+
+def _load_pattern_frequency(path):
+    """
+    Loads the cumulative keyword frequencies saved by previous runs.
 
+    Args:
+        path (str): The path of the frequency file.
 
-def main(input_dir, output_file, log_file):
+    Returns:
+        dict: A mapping from keyword pattern to its number of matches, which is empty
+              if the file does not exist or cannot be read.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            frequency = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read keyword frequencies from '{path}': {e}")
+        return {}
+    if not isinstance(frequency, dict):
+        return {}
+    # Entries that are not a count for a pattern are ignored, in case the file was edited.
+    return {
+        keyword: count for keyword, count in frequency.items()
+        if isinstance(count, int) and not isinstance(count, bool)
+    }
+
+
+def _save_pattern_frequency(path, frequency):
+    """
+    Saves the cumulative keyword frequencies for future runs.
+
+    Args:
+        path (str): The path of the frequency file. Its directory is created if needed.
+        frequency (dict): A mapping from keyword pattern to its number of matches.
+    """
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(frequency, f, indent=2)
+    except OSError as e:
+        logging.warning(f"Could not save keyword frequencies to '{path}': {e}")
+
+
+def _get_file_size(entry):
+    """
+    Returns the size of a directory entry, for ordering the files to process.
+
+    Args:
+        entry (os.DirEntry): The directory entry of an HTML filing.
+
+    Returns:
+        int: The size of the file in bytes, or 0 if it can no longer be read (for example,
+             if it was removed after the directory was scanned). Such a file is still
+             handed to parse_html_filing, which reports the error for that file alone.
+    """
+    try:
+        return entry.stat().st_size
+    except OSError:
+        return 0
+
+
+def main(input_dir, output_file, log_file, verbose=False):
     """
     The main execution function of the script. It handles file discovery,
     orchestrates the parsing loop, and generates the final CSV and reports.
     """
-    setup_logging(log_file)
+    setup_logging(log_file, verbose)
     total_start_time = time.time()
     
     logging.info("="*25 + " Starting EDGAR EPS Parser " + "="*25)
@@ -359,32 +878,72 @@ def main(input_dir, output_file, log_file):
         logging.error(f"Error: Input directory not found at '{input_dir}'")
         return
 
-    # Discover all HTML files in the input directory.
-    files_to_process = [f for f in os.listdir(input_dir) if f.lower().endswith((".html", ".htm"))]
+    # Discover all HTML files in the input directory. The largest files are dispatched
+    # first, so that the slowest filings are not left running alone at the end of the run.
+    with os.scandir(input_dir) as entries:
+        files_to_process = [
+            entry for entry in entries
+            if entry.is_file() and entry.name.lower().endswith((".html", ".htm"))
+        ]
+    files_to_process.sort(key=_get_file_size, reverse=True)
     if not files_to_process:
         logging.warning("No HTML files found in the input directory.")
         return
         
     logging.info(f"Found {len(files_to_process)} HTML file(s) to process in '{input_dir}'")
     
-    # Process each file and store the results.
-    results = []
-    for filename in files_to_process:
-        file_path = os.path.join(input_dir, filename)
-        fname, eps = parse_html_filing(file_path)
-        results.append({
-            "filename": fname,
-            "EPS": eps if eps is not None else "Not Found"
-        })
-
-    # Write the collected results to a CSV file.
-    logging.info(f"Consolidating {len(results)} results and writing to '{output_file}'...")
-    df = pd.DataFrame(results)
+    file_paths = [entry.path for entry in files_to_process]
+
+    # Each result is written to the CSV file as soon as it is available, rather than
+    # collecting all of the results in memory first. Only errors from opening, writing and
+    # closing the file are reported as output file errors.
+    logging.info(f"Writing results to '{output_file}'...")
     try:
-        df.to_csv(output_file, index=False)
-        logging.info("CSV file written successfully.")
-    except Exception as e:
+        csv_file = open(output_file, 'w', newline='', encoding='utf-8')
+        writer = csv.writer(csv_file, lineterminator=os.linesep)
+        writer.writerow(["filename", "EPS"])
+    except OSError as e:
         logging.error(f"Error writing to output file '{output_file}': {e}")
+        return
+
+    # Each filing is independent, so they are parsed in parallel across all CPU cores.
+    # Worker processes send their log records through a queue to a listener running in
+    # this process, which forwards them to the configured file and console handlers.
+    root_logger = logging.getLogger()
+    log_queue = multiprocessing.Queue()
+    listener = QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    listener.start()
+
+    write_error = None
+    try:
+        with ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(log_queue, root_logger.level, filing_logger.level)
+        ) as executor:
+            for fname, eps, keyword_pattern in executor.map(parse_html_filing, file_paths, chunksize=8):
+                if keyword_pattern:
+                    # If a match was found, record which keyword pattern was successful.
+                    KEYWORD_FREQUENCY[keyword_pattern] += 1
+                try:
+                    writer.writerow([fname, eps if eps is not None else "Not Found"])
+                except OSError as e:
+                    # Stop parsing the filings that have not started yet, since their
+                    # results could not be written anyway.
+                    write_error = e
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    break
+    finally:
+        listener.stop()
+        try:
+            csv_file.close()
+        except OSError as e:
+            write_error = write_error or e
+
+    if write_error is not None:
+        logging.error(f"Error writing to output file '{output_file}': {write_error}")
+    else:
+        logging.info("CSV file written successfully.")
         
     # --- Final Performance and Analytics Summary ---
     total_duration = time.time() - total_start_time
@@ -403,6 +962,21 @@ def main(input_dir, output_file, log_file):
     else:
         logging.warning("\nNo keywords resulted in a successful match.")
 
+    # Add this run's matches to the totals of all previous runs, and rank the patterns of
+    # each tier by them. Patterns that have never matched are candidates for pruning.
+    cumulative_frequency = _load_pattern_frequency(PATTERN_FREQUENCY_FILE)
+    for keyword, count in KEYWORD_FREQUENCY.items():
+        cumulative_frequency[keyword] = cumulative_frequency.get(keyword, 0) + count
+    _save_pattern_frequency(PATTERN_FREQUENCY_FILE, cumulative_frequency)
+
+    logging.info("\n--- Cumulative Keyword Ranking (All Runs) ---")
+    for priority, patterns in EPS_KEYWORD_PATTERNS.items():
+        ranked_patterns = sorted(patterns, key=lambda p: -cumulative_frequency.get(p.pattern, 0))
+        for pattern in ranked_patterns:
+            count = cumulative_frequency.get(pattern.pattern, 0)
+            note = "" if count else " (never matched)"
+            logging.info(f'[{priority}] {count} match(es) for: "{pattern.pattern}"{note}')
+
 
 # This block ensures that the script runs only when executed directly,
 # not when imported as a module into another script.
@@ -425,6 +999,11 @@ if __name__ == "__main__":
         default='parser.log',
         help="Path for the output log file. Defaults to 'parser.log'."
     )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help="Log the progress and result of every individual filing.\nBy default, only failures and the final summary are logged."
+    )
 
     args = parser.parse_args()
-    main(args.input_dir, args.output_file, args.log_file)
\ No newline at end of file
+    main(args.input_dir, args.output_file, args.log_file, args.verbose)
\ No newline at end of file